@@ -0,0 +1,24 @@
+'''Optional JIT-compiled kernels module'''
+
+try:
+    import numpy
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def linenos_for_offsets(buffer, starts):
+        '''Compute line numbers for sorted match offsets in one fused pass'''
+        linenos = numpy.empty(starts.shape[0], numpy.int64)
+        line = 1
+        previous = 0
+        for k in range(starts.shape[0]):
+            for i in range(previous, starts[k]):
+                if buffer[i] == 10:
+                    line += 1
+            previous = starts[k]
+            linenos[k] = line
+        return linenos
+else:
+    linenos_for_offsets = None
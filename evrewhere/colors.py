@@ -1,8 +1,15 @@
 '''Colors module'''
 
 import os
-
-if os.getenv('EVREDONTUSECOLOR', '') == '1':
+import sys
+
+# Skip colorama entirely when colors cannot show up anyway: explicit
+# opt-outs or stdout piped to another program
+if (
+    os.getenv('EVREDONTUSECOLOR', '') == '1'
+    or os.getenv('NO_COLOR')
+    or not sys.stdout.isatty()
+):
     def init_colorama(*_a, **_kw):
         '''No colorama initializer'''
 
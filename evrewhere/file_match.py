@@ -2,16 +2,68 @@
 
 import re
 import pathlib
+from typing import Union
+
 from evrewhere.colors import Fore, Style
 
+class SpanMatch:
+    '''Minimal stand-in for re.Match keeping only group 0 and its span
+
+    A real re.Match pins the whole source string it was found in; this
+    keeps just the matched text so the file content can be collected.'''
+    __slots__ = ('_text', '_span')
+
+    def __init__(self, match: re.Match):
+        self._text = match.group(0)
+        self._span = match.span()
+
+    def group(self, index: int = 0):
+        '''Return the matched text; only group 0 is retained'''
+        if index:
+            raise IndexError('no such group')
+        return self._text
+
+    def start(self, index: int = 0) -> int:
+        '''Return the start offset of the match'''
+        return self.span(index)[0]
+
+    def end(self, index: int = 0) -> int:
+        '''Return the end offset of the match'''
+        return self.span(index)[1]
+
+    def span(self, index: int = 0) -> tuple:
+        '''Return the (start, end) offsets of the match'''
+        if index:
+            raise IndexError('no such group')
+        return self._span
+
+    def __repr__(self) -> str:
+        return f'<SpanMatch span={self._span!r}, match={self._text!r}>'
+
+
 class FileMatch:
-    '''Stores regex match information'''
-    def __init__(self, path: pathlib.Path, match: re.Match):
-        self.path: pathlib.Path = path
+    '''Stores regex match information
+
+    newlines, when set, is the file's sorted newline-offset table shared
+    by every match of that file; handlers can bisect it to translate
+    offsets into line numbers without rescanning the content.'''
+    __slots__ = ('path', 'match', 'lineno', 'line', 'line_offset', 'newlines')
+
+    def __init__(self, path: Union[str, pathlib.Path], match: re.Match):
+        self.path: Union[str, pathlib.Path] = path
         self.match: re.Match = match
         self.lineno: int = 0
         self.line: str = None
         self.line_offset: int = None
+        self.newlines: list = None
+
+    def detach(self):
+        '''Drop the re.Match, keeping only its text and span
+
+        Releases the reference to the source buffer; afterwards only
+        group 0 is available.'''
+        if isinstance(self.match, re.Match):
+            self.match = SpanMatch(self.match)
 
     def __str__(self) -> str:
         return (
@@ -1,33 +1,175 @@
 '''Pattern Finder module'''
 
-from typing import Callable, Union, Iterable, List, IO
+from typing import Callable, Dict, Union, Iterable, List, IO
 
 import io
 import os
 import re
 import sys
-import pathlib
+import mmap
+import bisect
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    from re import _parser as re_parser
+except ImportError:  # Python < 3.11
+    import sre_parse as re_parser
+
 from evrewhere import FileMatch
+from evrewhere._kernels import linenos_for_offsets
 from evrewhere.colors import Fore, Style
 
 
+def has_anchors(pattern_string: str) -> bool:
+    '''Detect unescaped ^ or $ anchors outside character classes'''
+    escaped = False
+    in_class = False
+    for char in pattern_string:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char in '^$':
+            return True
+    return False
+
+
+@lru_cache(maxsize=512)
 def create_pattern(pattern_string: str, *,
     case_insensitive: re.RegexFlag = None,
     dot_all: re.RegexFlag = None
 ) -> re.Pattern:
     '''Convert a pattern string into regex Pattern object'''
-    flags = re.MULTILINE
+    # MULTILINE only matters to ^/$ anchors and costs extra per-character
+    # checks in the engine, so grant it only when anchors are present
+    flags = re.MULTILINE if has_anchors(pattern_string) else 0
     flags |= dot_all or 0
     flags |= case_insensitive or 0
     return re.compile(pattern_string, flags)
 
 
-def limited(seq: Iterable, limit: int):
-    '''Generate a limited number of results'''
-    for i, value in enumerate(seq):
-        if i >= limit:
-            break
-        yield value
+# Dispatching to a thread pool only pays off past a handful of files
+PARALLEL_THRESHOLD = 32
+
+# Limits small enough that direct search() calls beat the finditer generator
+SMALL_LIMIT = 16
+
+# Files smaller than this are cheaper to read than to map
+MMAP_THRESHOLD = 16 * 1024
+
+# A NUL byte this early marks a file as binary, mirroring grep
+BINARY_SNIFF_SIZE = 8192
+
+# Overlap carried between streaming windows; also the longest match the
+# streaming scanner can see across a window boundary
+CHUNK_OVERLAP = 4096
+
+# Lookaround, named backreferences and numeric backreferences cannot be
+# expressed by automaton engines such as re2
+BACKTRACKING_SYNTAX = re.compile(r'\(\?[=!<]|\(\?P=|\\[1-9]')
+
+
+# Prefiltering on a literal shorter than this costs more scans than it saves
+MIN_LITERAL_LENGTH = 3
+
+
+def required_literal(pattern: re.Pattern) -> Union[str, None]:
+    '''Longest literal run every match must contain, or None'''
+    if pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = re_parser.parse(pattern.pattern, pattern.flags)
+    except re.error:
+        return None
+    best = []
+    run = []
+    for operator, argument in parsed:
+        if operator is re_parser.LITERAL:
+            run.append(argument)
+        else:
+            # Branches, repeats and classes end the guaranteed literal run
+            if len(run) > len(best):
+                best = run
+            run = []
+    if len(run) > len(best):
+        best = run
+    if len(best) < MIN_LITERAL_LENGTH:
+        return None
+    return ''.join(map(chr, best))
+
+
+def engine_warning(engine: str, reason: str):
+    '''Report that an explicitly requested engine cannot be used'''
+    print(
+        f'{Fore.RED}{Style.BRIGHT}warning:',
+        f'--engine={engine} unavailable ({reason}), falling back to re',
+        file=sys.stderr
+    )
+
+
+def select_pattern_engine(pattern: re.Pattern, engine: str) -> re.Pattern:
+    '''Swap in the linear-time re2 engine when available and expressible'''
+    if engine not in ('auto', 're2'):
+        return pattern
+    if re2 is None:
+        if engine == 're2':
+            engine_warning(engine, 're2 module not installed')
+        return pattern
+    if BACKTRACKING_SYNTAX.search(pattern.pattern):
+        if engine == 're2':
+            engine_warning(engine, 'pattern needs backtracking')
+        return pattern
+    try:
+        return re2.compile(pattern.pattern, pattern.flags)
+    except re.error:
+        # re2 rejects constructs it cannot translate
+        if engine == 're2':
+            engine_warning(engine, 'pattern not supported by re2')
+        return pattern
+
+
+def collect_paths(root: os.PathLike) -> Iterable[str]:
+    '''Collect file paths under a directory tree with scandir'''
+    # Iterative traversal keeps one frame for the whole walk and cannot
+    # hit the recursion limit on deep trees
+    pending = collections.deque((root,))
+    while pending:
+        directory = pending.popleft()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    # The no-follow checks reuse the readdir d_type and cost
+                    # no extra stat; only symlinks need one to find files
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path
+                    elif entry.is_symlink() and entry.is_file():
+                        yield entry.path
+        except OSError as error:
+            print(f'{Fore.RED}{Style.BRIGHT}warning:', error, file=sys.stderr)
 
 
 class PatternFinder:
@@ -39,7 +181,14 @@ class PatternFinder:
         line_numbers: bool = False,
         case_insensitive: bool = False,
         dot_all: bool = False,
-        full_lines: bool = False
+        full_lines: bool = False,
+        binary: bool = False,
+        parallel: bool = False,
+        engine: str = 'auto',
+        count_only: bool = False,
+        detach_matches: bool = False,
+        chunk_size: int = 0,
+        max_workers: int = 0
     ):
         self.pattern: re.Pattern = (
             create_pattern(
@@ -50,11 +199,30 @@ class PatternFinder:
             if isinstance(pattern, str) else
             pattern
         )
+        self.binary: bool = binary
+        self.pattern_bytes: re.Pattern = (
+            re.compile(self.pattern.pattern.encode(), self.pattern.flags & ~re.UNICODE)
+            if binary else
+            None
+        )
+        self.required_literal: Union[str, None] = required_literal(self.pattern)
+        self.engine: str = engine
+        self.pattern = select_pattern_engine(self.pattern, engine)
         self.limit: int = limit
+        self.count_only: bool = count_only
+        # Retained matches keep their whole source buffer alive through
+        # re.Match; detaching trims them to group 0 once accepted
+        self.detach_matches: bool = detach_matches
+        self.chunk_size: int = chunk_size
+        self.counts: Dict[str, int] = {}
+        self.hyperscan_db = self.__build_hyperscan_database() if engine == 'hyperscan' else None
+        self.parallel: bool = parallel
+        self.max_workers: int = max_workers or (os.cpu_count() or 1) * 2
         self.results: List[FileMatch] = []
         self.count_lineno: bool = line_numbers
         self.match_handler: Callable[[str, int, int, FileMatch], bool] = \
             PatternFinder.default_match_handler
+        self.full_lines: bool = full_lines
         if full_lines:
             self.__preprocess_result = self.__calculate_line_bounds
         else:
@@ -64,21 +232,15 @@ class PatternFinder:
         '''Perform search over file located at the specified path'''
         for path in paths:
             try:
-                file = open(path) if not isinstance(path, io.TextIOBase) else path
+                if isinstance(path, io.TextIOBase):
+                    file = path
+                else:
+                    file = open(path, 'rb') if self.binary else open(path)
             except IsADirectoryError as error:
                 # Handle directories
                 if not recursive:
                     raise error from None
-                try:
-                    filenames = os.listdir(path)
-                    self.search(
-                        (pathlib.Path(path) / filename for filename in filenames),
-                        recursive=recursive
-                    )
-                except OSError as error:
-                    print(f'{Fore.RED}{Style.BRIGHT}warning:', error, file=sys.stderr)
-                except Exception as error:
-                    raise error from None
+                self.__search_directory(path)
             except OSError as error:
                 print(f'evre: {path}: {error.strerror}', file=sys.stderr)
             else:
@@ -86,31 +248,396 @@ class PatternFinder:
                 self.__process_file(file)
         return self.results
 
+    def finditer(self, paths: List[os.PathLike],
+                 recursive: bool = False) -> Iterable[FileMatch]:
+        '''Yield results file by file instead of retaining them all
+
+        Peak memory stays bounded by the densest single file and the
+        first match surfaces before the whole tree has been scanned.
+        Scanning is serial; parallel mode needs the batching search().'''
+        for path in paths:
+            try:
+                if isinstance(path, io.TextIOBase):
+                    file = path
+                else:
+                    file = open(path, 'rb') if self.binary else open(path)
+            except IsADirectoryError as error:
+                # Handle directories
+                if not recursive:
+                    raise error from None
+                for file_path in collect_paths(path):
+                    self.__process_path(file_path)
+                    yield from self.__drain_results()
+            except OSError as error:
+                print(f'evre: {path}: {error.strerror}', file=sys.stderr)
+            else:
+                # Handle regular files
+                self.__process_file(file)
+                yield from self.__drain_results()
+
+    def __drain_results(self) -> List[FileMatch]:
+        '''Hand over the accumulated results and start a fresh batch'''
+        results = self.results
+        self.results = []
+        return results
+
     @staticmethod
     def default_match_handler(_content: str, _begin: int, _end: int, _result: FileMatch) -> bool:
         '''Default match handler accepts every result'''
         return True
 
-    def __calculate_line_bounds(self, result: FileMatch, content: str, match: re.Match):
+    def __build_hyperscan_database(self):
+        '''Compile a Hyperscan database for match counting, if possible'''
+        if hyperscan is None:
+            engine_warning('hyperscan', 'hyperscan module not installed')
+            return None
+        if BACKTRACKING_SYNTAX.search(self.pattern.pattern):
+            engine_warning('hyperscan', 'pattern needs backtracking')
+            return None
+        flags = hyperscan.HS_FLAG_MULTILINE
+        if self.pattern.flags & re.IGNORECASE:
+            flags |= hyperscan.HS_FLAG_CASELESS
+        if self.pattern.flags & re.DOTALL:
+            flags |= hyperscan.HS_FLAG_DOTALL
+        database = hyperscan.Database()
+        try:
+            database.compile(expressions=[self.pattern.pattern.encode()], flags=[flags])
+        except hyperscan.error:
+            # Pattern not expressible as a Hyperscan DFA
+            engine_warning('hyperscan', 'pattern not supported by hyperscan')
+            return None
+        return database
+
+    def __scan_any(self, file: IO):
+        '''Detect whether a file matches at all with Hyperscan
+
+        Hyperscan fires one event per match end offset with no leftmost
+        filtering, so its tallies cannot reproduce re's non-overlapping
+        counts; the database only answers quiet-mode existence queries,
+        where the first event settles the question'''
+        content = self.__read_content(file)
+        if isinstance(content, str):
+            content = content.encode()
+        path = sys.intern(str(file.name))
+        found = False
+
+        def on_match(_id, _begin, _end, _flags, _context=None):
+            nonlocal found
+            found = True
+            # A non-zero return tells Hyperscan to stop scanning
+            return 1
+
+        try:
+            self.hyperscan_db.scan(content, match_event_handler=on_match)
+        except hyperscan.error:
+            # Scan aborted by the handler on the first event
+            pass
+        if found:
+            self.counts[path] = self.counts.get(path, 0) + 1
+
+    def __search_directory(self, path: os.PathLike):
+        '''Scan every file below a directory, in parallel when worthwhile'''
+        if not self.parallel:
+            for file_path in collect_paths(path):
+                self.__process_path(file_path)
+            return
+        file_paths = list(collect_paths(path))
+        if len(file_paths) >= PARALLEL_THRESHOLD:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for _ in executor.map(self.__process_path, file_paths):
+                    pass
+        else:
+            for file_path in file_paths:
+                self.__process_path(file_path)
+
+    def __process_path(self, path: os.PathLike):
+        '''Open and scan a single file path'''
+        try:
+            file = open(path, 'rb') if self.binary else open(path)
+        except OSError as error:
+            print(f'evre: {path}: {error.strerror}', file=sys.stderr)
+        else:
+            with file:
+                self.__process_file(file)
+
+    def __count_result(self, result: FileMatch):
+        '''Tally an accepted result instead of retaining it'''
+        self.counts[result.path] = self.counts.get(result.path, 0) + 1
+
+    def __append_detached(self, result: FileMatch):
+        '''Retain a result trimmed to its matched text and span'''
+        result.detach()
+        self.results.append(result)
+
+    def __calculate_line_bounds(self, result: FileMatch, content: Union[str, bytes],
+                                begin: int, end: int, newlines: List[int] = None):
         # Find full line boundaries
-        newline_start = content.rfind('\n', 0, match.span()[0]) + 1
-        newline_end = content.find('\n', match.span()[1])
+        if newlines is not None:
+            # The shared newline table answers both bounds in O(log n)
+            left = bisect.bisect_left(newlines, begin)
+            newline_start = newlines[left - 1] + 1 if left > 0 else 0
+            right = bisect.bisect_left(newlines, end)
+            newline_end = newlines[right] if right < len(newlines) else len(content)
+        else:
+            newline = '\n' if isinstance(content, str) else b'\n'
+            newline_start = content.rfind(newline, 0, begin) + 1
+            newline_end = content.find(newline, end)
+            if newline_end < 0:
+                # A final line without a trailing newline ends the buffer
+                newline_end = len(content)
         result.line = content[newline_start:newline_end]
         result.line_offset = newline_start
 
+    @staticmethod
+    def __newline_table(content: Union[str, bytes]) -> List[int]:
+        '''Sorted offsets of every newline in the buffer'''
+        newline = '\n' if isinstance(content, str) else b'\n'
+        newlines = []
+        append = newlines.append
+        pos = content.find(newline)
+        while pos != -1:
+            append(pos)
+            pos = content.find(newline, pos + 1)
+        return newlines
+
+    @classmethod
+    def __compute_linenos(cls, content: Union[str, bytes], matches: List[re.Match],
+                          newlines: List[int] = None) -> List[int]:
+        '''Batch line numbers for all matches of a file'''
+        if newlines is not None:
+            return [bisect.bisect_left(newlines, match.start(0)) + 1 for match in matches]
+        if numpy is not None and (not isinstance(content, str) or content.isascii()):
+            buffer = numpy.frombuffer(
+                content.encode() if isinstance(content, str) else content, dtype=numpy.uint8
+            )
+            starts = numpy.fromiter(
+                (match.start(0) for match in matches), dtype=numpy.int64, count=len(matches)
+            )
+            if linenos_for_offsets is not None:
+                # Fused JIT pass over the buffer, one scan for all matches
+                return linenos_for_offsets(buffer, starts)
+            newlines = numpy.flatnonzero(buffer == ord('\n'))
+            return numpy.searchsorted(newlines, starts) + 1
+        # One C-speed find() sweep builds the table; each match then costs
+        # a binary search instead of a prefix scan
+        newlines = cls.__newline_table(content)
+        return [bisect.bisect_left(newlines, match.start(0)) + 1 for match in matches]
+
+    @staticmethod
+    def __count_newlines(content: Union[str, bytes], linesep: Union[str, bytes],
+                         begin: int, end: int) -> int:
+        '''Count line separators within content bounds'''
+        if isinstance(content, mmap.mmap):
+            # mmap does not offer a bounded count()
+            return content[begin:end].count(linesep)
+        return content.count(linesep, begin, end)
+
+    @staticmethod
+    def __advise_sequential(file: IO):
+        '''Hint aggressive sequential readahead to the kernel'''
+        if not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            os.posix_fadvise(
+                file.fileno(), 0, 0,
+                os.POSIX_FADV_SEQUENTIAL | os.POSIX_FADV_WILLNEED
+            )
+        except (OSError, io.UnsupportedOperation):
+            pass
+
+    def __read_content(self, file: IO) -> Union[str, bytes]:
+        '''Read file content, memory-mapping binary files when worthwhile'''
+        if not self.binary or isinstance(file, io.TextIOBase):
+            return file.read()
+        size = self.__file_size(file)
+        if size < MMAP_THRESHOLD:
+            # Mapping overhead outweighs the copy for small files
+            return file.read()
+        self.__advise_sequential(file)
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            # Non-mmappable files; read into one preallocated buffer
+            buffer = bytearray(size)
+            read = file.readinto(memoryview(buffer))
+            return buffer if read == size else buffer[:read]
+
+    @staticmethod
+    def __search_limited(pattern: re.Pattern, content: Union[str, bytes], limit: int) -> list:
+        '''Collect up to limit matches with direct search() calls'''
+        matches = []
+        pos = 0
+        end = len(content)
+        while len(matches) < limit:
+            match = pattern.search(content, pos)
+            if match is None:
+                break
+            matches.append(match)
+            pos = match.end(0)
+            if pos == match.start(0):
+                # Force progress past zero-width matches; search() clamps
+                # pos to the length, so walking past the end would repeat
+                # the final empty match forever
+                pos += 1
+                if pos > end:
+                    break
+        return matches
+
+    @staticmethod
+    def __file_size(file: IO) -> int:
+        try:
+            return os.fstat(file.fileno()).st_size
+        except (OSError, io.UnsupportedOperation):
+            return 0
+
+    def __stream_file(self, file: IO):
+        '''Scan a file in overlapping windows to cap resident memory'''
+        self.__advise_sequential(file)
+        # Text mode already translates platform line endings to '\n', so
+        # counting os.linesep would find nothing on Windows; the single
+        # character needle also takes the faster memchr-style scan
+        if 'b' in getattr(file, 'mode', ''):
+            pattern = self.pattern_bytes or self.pattern
+            linesep = b'\n'
+            carry = b''
+        else:
+            pattern = self.pattern
+            linesep = '\n'
+            carry = ''
+        count_only = \
+            self.count_only and self.match_handler is PatternFinder.default_match_handler
+        # One interned path string is shared by every match from this file
+        path = sys.intern(str(file.name))
+        overlap = min(CHUNK_OVERLAP, max(self.chunk_size // 2, 1))
+        line = 1
+        hits = 0
+        processed = 0
+        while True:
+            try:
+                chunk = file.read(self.chunk_size)
+            except UnicodeDecodeError:
+                # Likely tried to open a binary file for text output
+                return
+            buffer = carry + chunk
+            if not buffer:
+                break
+            # Matches starting inside the overlap are re-found, complete,
+            # in the next window; matches longer than the overlap may be
+            # truncated at the window boundary
+            boundary = len(buffer) if not chunk else max(len(buffer) - overlap, 1)
+            # The next window must not rescan text a match already
+            # consumed, or occurrences overlapping the boundary would be
+            # found twice; track the furthest consumed offset
+            next_start = boundary
+            cursor = 0
+            window_line = line
+            for match in pattern.finditer(buffer):
+                begin, end = match.span()
+                if begin >= boundary:
+                    break
+                if 0 < self.limit <= processed:
+                    break
+                processed += 1
+                if end > next_start:
+                    next_start = end
+                if count_only:
+                    hits += 1
+                    continue
+                result = FileMatch(path, match)
+                self.__preprocess_result(result, buffer, begin, end)
+                if self.count_lineno:
+                    window_line += \
+                        self.__count_newlines(buffer, linesep, cursor, begin)
+                    cursor = begin
+                    result.lineno = window_line
+                if self.match_handler(buffer, begin, end, result):
+                    if self.count_only:
+                        self.__count_result(result)
+                    elif self.detach_matches:
+                        self.__append_detached(result)
+                    else:
+                        self.results.append(result)
+            if not chunk or 0 < self.limit <= processed:
+                break
+            if self.count_lineno:
+                line += self.__count_newlines(buffer, linesep, 0, next_start)
+            carry = buffer[next_start:]
+        if hits:
+            self.counts[path] = self.counts.get(path, 0) + hits
+
     def __process_file(self, file: IO):
+        if self.hyperscan_db is not None:
+            self.__scan_any(file)
+            return
+        if self.chunk_size > 0 and self.__file_size(file) > self.chunk_size:
+            self.__stream_file(file)
+            return
         try:
-            content: str = file.read()
+            content: Union[str, bytes] = self.__read_content(file)
         except UnicodeDecodeError:
             # Likely tried to open a binary file for text output
             return
-        matches = self.pattern.finditer(content)
-        if self.limit > 0:
-            matches = limited(matches, self.limit)
-        for match in matches:
-            result = FileMatch(file.name, match)
-            self.__preprocess_result(result, content, match)
-            if self.count_lineno:
-                result.lineno = content.count(os.linesep, 0, match.start(0)) + 1
-            if self.match_handler(content, *match.span(), result):
-                self.results.append(result)
+        if isinstance(content, str):
+            pattern = self.pattern
+            literal = self.required_literal
+        else:
+            if b'\x00' in content[:BINARY_SNIFF_SIZE]:
+                # Text mode skips binaries via UnicodeDecodeError; binary
+                # mode needs an explicit sniff
+                return
+            pattern = self.pattern_bytes or self.pattern
+            literal = self.required_literal.encode() if self.required_literal else None
+        # Skip the regex engine entirely when the required literal is absent
+        if literal is not None and content.find(literal) < 0:
+            return
+        # One interned path string is shared by every match from this file
+        path = sys.intern(str(file.name))
+        if 0 < self.limit <= SMALL_LIMIT:
+            matches = self.__search_limited(pattern, content, self.limit)
+        else:
+            matches = pattern.finditer(content)
+            if self.limit > 0:
+                matches = islice(matches, self.limit)
+        if self.count_only and self.match_handler is PatternFinder.default_match_handler:
+            # Tallying matches needs no FileMatch objects at all
+            hits = sum(1 for _ in matches)
+            if hits:
+                self.counts[path] = self.counts.get(path, 0) + hits
+            return
+        # Bind loop invariants to locals; the loop body runs once per match
+        preprocess = self.__preprocess_result
+        handler = self.match_handler
+        # With a filtering handler, count-only tallies accepted matches
+        # instead of retaining them
+        if self.count_only:
+            append = self.__count_result
+        elif self.detach_matches:
+            append = self.__append_detached
+        else:
+            append = self.results.append
+        if self.count_lineno:
+            # One pass over the buffer amortizes line numbering across all
+            # matches; with full lines on, the same table serves the bounds
+            # and custom handlers get it for their own offset queries
+            matches = list(matches)
+            newlines = (
+                self.__newline_table(content)
+                if self.full_lines or handler is not PatternFinder.default_match_handler else
+                None
+            )
+            linenos = self.__compute_linenos(content, matches, newlines)
+            for index, match in enumerate(matches):
+                begin, end = match.span()
+                result = FileMatch(path, match)
+                result.newlines = newlines
+                preprocess(result, content, begin, end, newlines)
+                result.lineno = int(linenos[index])
+                if handler(content, begin, end, result):
+                    append(result)
+        else:
+            for match in matches:
+                begin, end = match.span()
+                result = FileMatch(path, match)
+                preprocess(result, content, begin, end)
+                if handler(content, begin, end, result):
+                    append(result)
@@ -1,14 +1,40 @@
 '''Printers module'''
 
-from itertools import cycle
+import string
+import sys
 from evrewhere.colors import COLORS, Fore, Style
 from evrewhere.file_match import FileMatch
 
+_FORMATTER = string.Formatter()
+
+# Escape codes resolved once at import; attribute lookups on Fore/Style
+# would otherwise run on every rendered prefix
+_MAGENTA = Fore.MAGENTA
+_GREEN = Fore.GREEN
+_CYAN = Fore.CYAN
+_BRIGHT = Style.BRIGHT
+_RESET = Style.RESET_ALL
+
+
+def decoded(value):
+    '''Decode byte slices produced by binary-mode searches for display'''
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return value
+
+
 class VerbosePrinter:
     '''Regular printer that shows the result object'''
-    def print(self, result: FileMatch, *args: str, **kwargs):
+    def __init__(self):
+        self._write = sys.stdout.write
+
+    def format(self, result: FileMatch) -> str:
+        '''Render a result without printing it'''
+        return str(result)
+
+    def print(self, result: FileMatch, *args, sep: str = ' ', end: str = '\n'):
         '''Printing function'''
-        print(result, *args, **kwargs)
+        self._write(sep.join((self.format(result), *map(str, args))) + end)
 
 
 class FileInfoPrefixFormat:
@@ -17,38 +43,54 @@ class FileInfoPrefixFormat:
         with_filename: bool = False,
         with_lineno: bool = False,
     ):
-        self.filename_format: str = (
-            f'{Fore.MAGENTA}' + '{path}' + f'{Fore.CYAN}:'
-            if with_filename else
-            ''
-        )
-        self.linenumber_format: str = (
-            f'{Fore.GREEN}' + '{lineno}' + f'{Fore.CYAN}:'
-            if with_lineno else
-            ''
-        )
-
-    def prefixes(self, path: str, lineno: int) -> str:
+        self._last_path: str = None
+        self._last_path_prefix: str = ''
+        # One write per printed line skips print()'s argument handling
+        # and per-call stdout lookup
+        self._write = sys.stdout.write
+        # Bind the one implementation this configuration needs; the
+        # generic version would re-check both flags on every match
+        if with_filename and with_lineno:
+            self.prefixes = self.__prefixes_filename_lineno
+        elif with_filename:
+            self.prefixes = self.__prefixes_filename
+        elif with_lineno:
+            self.prefixes = self.__prefixes_lineno
+        else:
+            self.prefixes = self.__prefixes_plain
+
+    def __filename_prefix(self, path: str) -> str:
+        # Results arrive grouped per file, so the path part almost always
+        # matches the previously rendered one
+        if path is not self._last_path:
+            self._last_path = path
+            self._last_path_prefix = f'{_MAGENTA}{path}{_CYAN}:'
+        return self._last_path_prefix
+
+    def __prefixes_filename_lineno(self, path: str, lineno: int) -> str:
         '''Returns prefixes for the FileMatch'''
-        return (
-            # File path part
-            self.filename_format.format(path=path) +
-            # Line number part
-            self.linenumber_format.format(lineno=lineno) +
-            # Drop all styles
-            Style.RESET_ALL
-        )
+        return f'{self.__filename_prefix(path)}{_GREEN}{lineno}{_CYAN}:{_RESET}'
+
+    def __prefixes_filename(self, path: str, _lineno: int) -> str:
+        '''Returns prefixes for the FileMatch'''
+        return self.__filename_prefix(path) + _RESET
+
+    @staticmethod
+    def __prefixes_lineno(_path: str, lineno: int) -> str:
+        '''Returns prefixes for the FileMatch'''
+        return f'{_GREEN}{lineno}{_CYAN}:{_RESET}'
+
+    @staticmethod
+    def __prefixes_plain(_path: str, _lineno: int) -> str:
+        '''Returns prefixes for the FileMatch'''
+        return _RESET
 
 
 class FileInfoPrefixPrinter(FileInfoPrefixFormat):
     '''Prints colored filename and line number prefixes'''
-    def print(self, path: str, lineno: int, *args: str, **kwargs):
+    def print(self, path: str, lineno: int, *args, sep: str = ' ', end: str = '\n'):
         '''Printing function'''
-        print(
-            self.prefixes(path, lineno),
-            *args,
-            **kwargs,
-        )
+        self._write(sep.join((self.prefixes(path, lineno), *map(str, args))) + end)
 
 
 class MatchPrinter(FileInfoPrefixFormat):
@@ -62,43 +104,101 @@ class MatchPrinter(FileInfoPrefixFormat):
         self.template = template or '{0}'
         self.group_count = group_count
         self.full_lines = full_lines
+        self._colors = tuple(COLORS.values())
+        self._ncolors = len(self._colors)
         if template is None:
-            self.process_match = self.__process_match_colored
+            if group_count:
+                self.process_match = self.__process_match_colored
+            elif full_lines:
+                # Without captures there is nothing to wrap in colors
+                self.process_match = self.__process_line_plain
+            else:
+                self.process_match = self.__process_match_plain
         else:
+            self.template_plan = self.__parse_template(self.template)
             self.process_match = self.__process_match_template
 
+    @staticmethod
+    def __parse_template(template: str) -> list:
+        '''Parse a format template once into literal and group segments'''
+        plan = []
+        auto_index = 0
+        for literal, field, spec, conversion in _FORMATTER.parse(template):
+            group = None
+            if field == '':
+                # Auto-numbered fields count positions like str.format
+                group = auto_index
+                auto_index += 1
+            elif field is not None:
+                if field.isdigit():
+                    group = int(field)
+                else:
+                    # Color fields are constants; fold them into the literal text
+                    literal += COLORS[field]
+            plan.append((literal, group, spec, conversion))
+        return plan
+
     def __process_match_template(self, result: FileMatch) -> str:
-        return self.template.format(result.match.group(0), *result.match.groups(), **COLORS)
+        match = result.match
+        parts = []
+        for literal, group, spec, conversion in self.template_plan:
+            if literal:
+                parts.append(literal)
+            if group is None:
+                continue
+            value = decoded(match.group(group))
+            if conversion:
+                value = _FORMATTER.convert_field(value, conversion)
+            parts.append(format(value, spec or ''))
+        return ''.join(parts)
+
+    @staticmethod
+    def __process_match_plain(result: FileMatch) -> str:
+        return decoded(result.match.group(0)) + _RESET
+
+    @staticmethod
+    def __process_line_plain(result: FileMatch) -> str:
+        return decoded(result.line) + _RESET
 
     def __process_match_colored(self, result: FileMatch) -> str:
-        color = cycle(COLORS.values())
-        output = ''
+        match = result.match
+        color_index = 0
+        parts = []
         last_end = 0
         if self.full_lines:
             fullmatch = result.line
             offset = result.line_offset
         else:
-            fullmatch = result.match.group(0)
-            offset = result.match.span()[0]
+            fullmatch = match.group(0)
+            offset = match.start()
         # Must be defined when captures are searched but not found
         end = 0
-        for i in range(self.group_count):
-            if not result.match.group(i + 1):
-                continue
-            # Wrap captures with colors
-            start = result.match.start(i + 1) - offset
-            end = result.match.end(i + 1) - offset
-            output += fullmatch[last_end:start] + Style.BRIGHT + next(color)
-            output += fullmatch[start:end] + Style.RESET_ALL
-            last_end = end
-        output += fullmatch[end:] + Style.RESET_ALL
-        return output
-
-    def print(self, result: FileMatch, *args, **kwargs):
+        if self.group_count:
+            # One C call fetches all group texts; regs already holds every
+            # span, instead of a group()/start()/end() triple per group
+            groups = match.groups()
+            spans = getattr(match, 'regs', None) or tuple(
+                match.span(index) for index in range(self.group_count + 1)
+            )
+            for i in range(self.group_count):
+                if not groups[i]:
+                    continue
+                # Wrap captures with colors
+                start, end = spans[i + 1]
+                start -= offset
+                end -= offset
+                color = self._colors[color_index % self._ncolors]
+                color_index += 1
+                parts.append(decoded(fullmatch[last_end:start]) + _BRIGHT + color)
+                parts.append(decoded(fullmatch[start:end]) + _RESET)
+                last_end = end
+        parts.append(decoded(fullmatch[end:]) + _RESET)
+        return ''.join(parts)
+
+    def format(self, result: FileMatch) -> str:
+        '''Render a result without printing it'''
+        return self.prefixes(result.path, result.lineno) + self.process_match(result)
+
+    def print(self, result: FileMatch, *args, sep: str = ' ', end: str = '\n'):
         '''Printing function'''
-        print(
-            self.prefixes(result.path, result.lineno) +
-            self.process_match(result),
-            *args,
-            **kwargs
-        )
+        self._write(sep.join((self.format(result), *map(str, args))) + end)
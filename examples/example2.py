@@ -1,10 +1,10 @@
 #!/usr/bin/env python3
 
 import os
+import re
 import sys
 import pathlib
 import argparse
-from itertools import islice
 
 # Workaround to not require installing the module
 sys.path.append(str(pathlib.Path(os.path.dirname(__file__)).parent))
@@ -20,10 +20,31 @@ def parse_arguments():
     return parser.parse_args()
 
 
+_BRACE = re.compile(r'[{}]')
+
+
+def _brace_balance(content: str, begin: int, end: int) -> bool:
+    '''Whether brace depth stays positive from begin (a "{") up to end'''
+    # The regex skips straight between braces at C speed instead of
+    # visiting every character from Python; pos/endpos bound the scan
+    # without copying the region out of the content
+    level = 0
+    for brace in _BRACE.finditer(content, begin, end):
+        if brace.group() == '{':
+            level += 1
+        else:
+            level -= 1
+            if not level:
+                return False
+    return True
+
+
 def find_namespace_used_inside_itself():
     args = parse_arguments()
     finder = PatternFinder(
-        r'\n?(namespace evre).*?{.*?(evre::\w+)',
+        # The namespace keyword is a fixed literal; capturing it only made
+        # the engine track an extra group per step
+        r'\n?namespace evre.*?{.*?(evre::\w+)',
         limit=0,
         line_numbers=True,
         case_insensitive=False,
@@ -33,32 +54,36 @@ def find_namespace_used_inside_itself():
     columns = []
     max_prefix_width = 0
     def handle_false_positives(content: str, begin: int, end: int, result: FileMatch):
-        namespace_level = 0
-        begin = content.find('{', begin, end)
-        for c in islice(content, begin, end):
-            if c == '{':
-                namespace_level += 1
-            elif c == '}':
-                namespace_level -= 1
-            if not namespace_level:
-                return False
-        begin = content.rfind('\n', result.match.start(0), result.match.start(2) + 1) + 1
-        last_line = content[begin:result.match.start(2)].strip()
-        if last_line.lstrip().startswith('//') or last_line.count('"') % 2 != 0:
+        if not _brace_balance(content, content.find('{', begin, end), end):
+            # The namespace closed before the evre:: usage
+            return False
+        match = result.match
+        match_start = match.start(0)
+        usage_start = match.start(1)
+        begin = content.rfind('\n', match_start, usage_start + 1) + 1
+        # Bounded count and startswith query the original buffer; slicing
+        # and stripping the line allocated two copies per match
+        if content.count('"', begin, usage_start) & 1:
+            return False
+        comment_start = begin
+        while comment_start < usage_start and content[comment_start] in ' \t':
+            comment_start += 1
+        if content.startswith('//', comment_start):
             return False
-        result.lineno += content.count(os.linesep, result.match.start(0), result.match.start(1))
+        # Only the optional leading newline sits before the keyword
+        result.lineno += match.group(0).startswith('\n')
         nonlocal columns, max_prefix_width
-        column = result.match.start(2) - begin + 1 + 4  # skip past evre::
+        column = usage_start - begin + 1 + 4  # skip past evre::
         max_prefix_width = max(max_prefix_width, len(f'{result.path}:{result.lineno}:{column}'))
         columns.append(column)
         return True
 
     finder.match_handler = handle_false_positives
     print('Searching for redundand evre:: usages within evre namespace')
-    for result, column in zip(finder.search(args.paths, recursive=any(path.is_dir() for path in args.paths)), columns):
+    for result, column in zip(finder.search(args.paths, recursive=True), columns):
         print(
             '{0:{2}} {1}'.format(
-                f'{result.path}:{result.lineno}:{column}', result.match.group(1), max_prefix_width
+                f'{result.path}:{result.lineno}:{column}', 'namespace evre', max_prefix_width
             )
         )
     printer = MatchPrinter(None, finder.pattern.groups, with_filename=True, with_lineno=True, full_lines=True)
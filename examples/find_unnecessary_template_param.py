@@ -5,6 +5,7 @@ import os
 import sys
 import pathlib
 import argparse
+from bisect import bisect_left
 
 # Workaround to not require installing the module
 sys.path.append(str(pathlib.Path(os.path.dirname(__file__)).parent))
@@ -30,13 +31,20 @@ def find_incorrect_cpp20_class_constructors():
     def handle_false_positives(content: str, begin: int, end: int, result: FileMatch):
         # If the match contains '};' this may be a class ending
         # so the regex may have found a false-positive
-        result.lineno += content.count(os.linesep, result.match.start(0), result.match.start(2))
+        # The finder shares the file's newline table; two bisections
+        # replace a scan over the matched span
+        match = result.match
+        newlines = result.newlines
+        result.lineno += (
+            bisect_left(newlines, match.start(2)) -
+            bisect_left(newlines, match.start(0))
+        )
         prefix = f'{Fore.YELLOW}MAYBE' if content.count('};', begin, end) > 0 else f'{Fore.GREEN}FOUND'
-        class_name = result.match.group(1)
+        class_name = match.group(1)
         print(f'{Style.BRIGHT}{prefix}{Style.RESET_ALL} {result.path}:{result.lineno} class={Fore.RED}{class_name}')
 
     finder.match_handler = handle_false_positives
-    finder.search(args.paths, recursive=any(path.is_dir() for path in args.paths))
+    finder.search(args.paths, recursive=True)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,32 @@
+'''Setup script for evREwhere'''
+
+import os
+import pathlib
+from setuptools import setup
+
+requirements = pathlib.Path('requirements.txt').read_text(encoding='utf-8').splitlines()
+
+# Opt-in ahead-of-time compilation of the hot modules; the pure-Python
+# package is the default and the only option when mypyc is absent
+ext_modules = []
+if os.getenv('EVRE_USE_MYPYC', '') == '1':
+    try:
+        from mypyc.build import mypycify
+    except ImportError:
+        pass
+    else:
+        ext_modules = mypycify([
+            'evrewhere/file_match.py',
+            'evrewhere/printers.py',
+        ])
+
+setup(
+    name='evrewhere',
+    version='1.0.0',
+    description='Multiline regex matcher with colors',
+    packages=['evrewhere'],
+    scripts=['evre'],
+    install_requires=requirements,
+    python_requires='>=3.8',
+    ext_modules=ext_modules,
+)